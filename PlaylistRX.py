@@ -1,16 +1,71 @@
 import json
+import logging
+import os
 import random
+import re
 import time
 import argparse
+import dbm
+import pickle
+import shelve
 import sys
 import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import chain
+import requests
+from requests.adapters import HTTPAdapter
 from spotipy import Spotify
 from spotipy.oauth2 import SpotifyOAuth
 from spotipy.exceptions import SpotifyException
 
+logger = logging.getLogger(__name__)  # Retry messages; unconfigured, warnings still go to stderr
+# What a missing, unwritable or corrupted .rxcache can raise; the cache is only for speed, so these never stop a run
+cacheErrors = dbm.error + (OSError, pickle.PickleError, ValueError, SyntaxError, TypeError, EOFError)
+
+class TokenBucket:
+    """Thread-safe token bucket whose refill rate adapts to rate limiting (AIMD)"""
+    def __init__(self, rate=10.0, burst=20, minRate=1.0, maxRate=None):
+        self.rate = rate
+        self.maxRate = rate if maxRate is None else max(rate, maxRate)  # Ceiling the additive increase climbs back to
+        self.minRate = minRate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.lastRefill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.lastRefill) * self.rate)
+        self.lastRefill = now
+
+    def acquire(self):
+        """Block until a token is available, then consume it"""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def shrink(self, factor=0.5):
+        """Multiplicative decrease, called when Spotify answers with a 429"""
+        with self.lock:
+            self._refill()
+            self.rate = max(self.minRate, self.rate * factor)
+
+    def increase(self, step=0.1):
+        """Additive increase, called after every successful request"""
+        with self.lock:
+            self._refill()
+            self.rate = min(self.maxRate, self.rate + step)
+
+
 class SpotifyConnection:
-    def __init__(self, clientId, clientSecret, redirectUri, scope, cachePath=".cache"):
+    def __init__(self, clientId, clientSecret, redirectUri, scope, cachePath=".cache", metadataCachePath=".rxcache", cacheTtl=24 * 60 * 60, maxWorkers=8, refreshMetadata=False):
         self.authManager = SpotifyOAuth(
             client_id=clientId,
             client_secret=clientSecret,
@@ -18,34 +73,64 @@ class SpotifyConnection:
             scope=scope,
             cache_path=cachePath
         )
-        self.client = Spotify(auth_manager=self.authManager)
+        # Share one pooled session so every API call reuses open TLS connections
+        session = requests.Session()
+        # Keep at least one pooled connection per worker thread so none of them has to reconnect
+        session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=max(20, maxWorkers), max_retries=0))
+        self.client = Spotify(
+            auth_manager=self.authManager,
+            requests_session=session,
+            requests_timeout=60,
+            retries=0
+        )
         self.userId = self.client.current_user()["id"]
         self.apiCallCount = 0  # Track total API calls
-
-    def _call_with_timeout(self, func, *args, timeout=30, **kwargs):
-        """Execute a function with a timeout using threading"""
-        result = [None]
-        exception = [None]
-        
-        def target():
+        self._apiCallLock = threading.Lock()  # apiCallCount is updated from worker threads
+        self.maxWorkers = maxWorkers  # Concurrent requests for per-artist/per-album fan-out
+        # Shared client-side rate limit for all API calls; starts at its ceiling and only slows down after a 429.
+        # The ceiling scales with maxWorkers (10 req/s each), so apiWorkers actually changes throughput
+        rateCeiling = 10.0 * maxWorkers
+        self._bucket = TokenBucket(rate=rateCeiling, burst=int(rateCeiling), maxRate=rateCeiling)
+        self._jitterRandom = random.Random()  # Separate from the global RNG so retries don't change a seeded run
+        self.metadataCachePath = metadataCachePath  # On-disk cache for track/artist/playlist lookups
+        self.cacheTtl = cacheTtl
+        self.refreshMetadata = refreshMetadata  # Ignore cached track info/top tracks, but still write fresh results
+        self._cacheLock = threading.Lock()  # shelve does not support concurrent access
+        self._playlistIndex = None  # Playlist name -> id, filled on first lookup
+        self._playlistIndexLock = threading.Lock()
+
+    def _cacheGet(self, keys, ttl=None):
+        """Return {key: value} for the keys found in the on-disk cache and not older than ttl"""
+        found = {}
+        now = time.time()
+        with self._cacheLock:
             try:
-                result[0] = func(*args, **kwargs)
-            except Exception as e:
-                exception[0] = e
-        
-        thread = threading.Thread(target=target)
-        thread.daemon = True
-        thread.start()
-        thread.join(timeout)
-        
-        if thread.is_alive():
-            print(f"    API call timed out after {timeout} seconds", file=sys.stderr)
-            raise TimeoutError(f"API call timed out after {timeout} seconds")
-        
-        if exception[0]:
-            raise exception[0]
-        
-        return result[0]
+                with shelve.open(self.metadataCachePath) as cache:
+                    for key in keys:
+                        entry = cache.get(key)
+                        if entry is not None and (ttl is None or now - entry[0] < ttl):
+                            found[key] = entry[1]
+            except cacheErrors as e:
+                logger.warning("Could not read metadata cache %s, fetching from Spotify instead: %s", self.metadataCachePath, e)
+                return {}
+        return found
+
+    def _cacheSet(self, entries):
+        """Write {key: value} pairs to the on-disk cache"""
+        if not entries:
+            return
+        now = time.time()
+        with self._cacheLock:
+            try:
+                with shelve.open(self.metadataCachePath) as cache:
+                    for key, value in entries.items():
+                        cache[key] = (now, value)
+            except cacheErrors as e:
+                logger.warning("Could not write metadata cache %s, continuing without it: %s", self.metadataCachePath, e)
+
+    def _backoffDelay(self, retryCount, base=1.0, cap=30.0, jitter=0.5):
+        """Exponential backoff with jitter so concurrent workers don't retry in lockstep"""
+        return min(cap, base * 2 ** (retryCount - 1)) * (1 + self._jitterRandom.random() * jitter)
 
     def _withRetry(self, func, *args, **kwargs):
         maxRetries = 5
@@ -53,65 +138,85 @@ class SpotifyConnection:
         
         while retryCount < maxRetries:
             try:
-                result = self._call_with_timeout(func, *args, timeout=60, **kwargs)
-                self.apiCallCount += 1  # Count successful API calls
+                self._bucket.acquire()
+                result = func(*args, **kwargs)
+                self._bucket.increase(0.5)
+                with self._apiCallLock:
+                    self.apiCallCount += 1  # Count successful API calls
                 return result
-            except TimeoutError as e:
+            except requests.exceptions.Timeout as e:
                 retryCount += 1
-                errorMsg = f"API call timed out: {str(e)}"
-                print(errorMsg, file=sys.stderr)
+                logger.warning("API call timed out: %s", e)
                 if retryCount >= maxRetries:
-                    print(f"Max retries ({maxRetries}) reached. Giving up.")
+                    logger.warning("Max retries (%d) reached. Giving up.", maxRetries)
                     raise
-                print(f"Retrying... (attempt {retryCount + 1}/{maxRetries})")
+                delay = self._backoffDelay(retryCount)
+                logger.warning("Retrying in %.1fs... (attempt %d/%d)", delay, retryCount + 1, maxRetries)
+                time.sleep(delay)
             except SpotifyException as e:
                 retryCount += 1
                 if e.http_status == 429:
-                    retryAfter = int(e.headers.get("Retry-After", 1))
-                    errorMsg = f"Rate limited by Spotify API. HTTP {e.http_status}. Sleeping {retryAfter}s"
-                    print(errorMsg, file=sys.stderr)
-                    print(f"Rate limited. Sleeping {retryAfter}s")
-                    time.sleep(retryAfter)
+                    self._bucket.shrink(0.5)
+                    retryAfter = e.headers.get("Retry-After")
+                    if retryAfter is not None:
+                        delay = int(retryAfter)
+                    else:
+                        delay = self._backoffDelay(retryCount)
+                    logger.warning("Rate limited by Spotify API. HTTP %s. Sleeping %.1fs", e.http_status, delay)
+                    time.sleep(delay)
                 elif e.http_status == 503:
-                    errorMsg = f"Spotify API service unavailable. HTTP {e.http_status}. Retrying in 5s"
-                    print(errorMsg, file=sys.stderr)
-                    print("Service unavailable. Retrying in 5s")
-                    time.sleep(5)
+                    delay = self._backoffDelay(retryCount)
+                    logger.warning("Spotify API service unavailable. HTTP %s. Retrying in %.1fs", e.http_status, delay)
+                    time.sleep(delay)
                 elif e.http_status >= 500:
-                    errorMsg = f"Spotify API server error. HTTP {e.http_status}. Retrying in 10s"
-                    print(errorMsg, file=sys.stderr)
-                    print(f"Server error {e.http_status}. Retrying in 10s")
-                    time.sleep(10)
+                    delay = self._backoffDelay(retryCount)
+                    logger.warning("Spotify API server error. HTTP %s. Retrying in %.1fs", e.http_status, delay)
+                    time.sleep(delay)
                 else:
-                    errorMsg = f"Spotify API error: HTTP {e.http_status} - {e.msg}"
-                    print(errorMsg, file=sys.stderr)
+                    logger.warning("Spotify API error: HTTP %s - %s", e.http_status, e.msg)
                     if retryCount >= maxRetries:
-                        print(f"Max retries ({maxRetries}) reached. Giving up.")
+                        logger.warning("Max retries (%d) reached. Giving up.", maxRetries)
                         raise
-                    print(f"Retrying... (attempt {retryCount + 1}/{maxRetries})")
+                    logger.warning("Retrying... (attempt %d/%d)", retryCount + 1, maxRetries)
             except Exception as e:
                 retryCount += 1
-                errorMsg = f"Unexpected error during Spotify API call: {str(e)}"
-                print(errorMsg, file=sys.stderr)
+                logger.warning("Unexpected error during Spotify API call: %s", e)
                 if retryCount >= maxRetries:
-                    print(f"Max retries ({maxRetries}) reached. Giving up.")
+                    logger.warning("Max retries (%d) reached. Giving up.", maxRetries)
                     raise
-                print(f"Retrying... (attempt {retryCount + 1}/{maxRetries})")
+                logger.warning("Retrying... (attempt %d/%d)", retryCount + 1, maxRetries)
         
         # If we get here, we've exhausted all retries
         raise Exception(f"Failed after {maxRetries} attempts")
 
+    def _ensurePlaylistIndex(self):
+        """Scan the user's playlists once and remember name -> id for later lookups"""
+        with self._playlistIndexLock:
+            if self._playlistIndex is not None:
+                return
+            index = {}
+            offset = 0
+            while True:
+                # current_user_playlists() can't project fields, so page through the raw endpoint
+                # and only ask for the name and id of each playlist
+                results = self._withRetry(
+                    self.client._get,
+                    "me/playlists",
+                    limit=50,
+                    offset=offset,
+                    fields="items(id,name),next"
+                )
+                items = results.get("items", [])
+                for p in items:
+                    index.setdefault(p["name"], p["id"])  # First match wins, as before
+                if not results.get("next") or not items:
+                    break
+                offset += len(items)
+            self._playlistIndex = index
+
     def getPlaylistIdByName(self, playlistName):
-        results = self._withRetry(self.client.current_user_playlists, limit=50)
-        while results:
-            for p in results["items"]:
-                if p["name"] == playlistName:
-                    return p["id"]
-            if results.get("next"):
-                results = self._withRetry(self.client.next, results)
-            else:
-                break
-        return None
+        self._ensurePlaylistIndex()
+        return self._playlistIndex.get(playlistName)
 
     def getOrCreatePlaylist(self, playlistName, description=""):
         playlistId = self.getPlaylistIdByName(playlistName)
@@ -124,9 +229,18 @@ class SpotifyConnection:
                 description=description
             )
             playlistId = newPl["id"]
+            with self._playlistIndexLock:
+                self._playlistIndex[playlistName] = playlistId
         return playlistId
 
     def getPlaylistTracks(self, playlistId):
+        # Skip the full pagination when the playlist hasn't changed since it was cached
+        cacheKey = f"playlist:{playlistId}"
+        snapshotId = self._withRetry(self.client.playlist, playlistId, fields="snapshot_id").get("snapshot_id")
+        cached = self._cacheGet([cacheKey]).get(cacheKey)
+        if cached and snapshotId and cached[0] == snapshotId:
+            return list(cached[1])
+        
         trackIds = []
         results = self._withRetry(
             self.client.playlist_items,
@@ -136,20 +250,18 @@ class SpotifyConnection:
             additional_types=["track"]
         )
         while results:
-            for item in results["items"]:
-                track = item.get("track")
-                if track and track.get("id"):
-                    trackIds.append(track["id"])
+            trackIds.extend(item["track"]["id"] for item in results["items"] if item.get("track") and item["track"].get("id"))
             if results.get("next"):
                 results = self._withRetry(self.client.next, results)
             else:
                 break
+        if snapshotId:
+            self._cacheSet({cacheKey: (snapshotId, trackIds)})
         return trackIds
 
     def getLikedTracks(self):
         trackIds = []
         offset = 0
-        batchNum = 1
         print("Fetching liked tracks...")
         
         while True:
@@ -157,23 +269,16 @@ class SpotifyConnection:
             items = results.get("items", [])
             if not items:
                 break
-            for item in items:
-                track = item.get("track")
-                if track and track.get("id"):
-                    trackIds.append(track["id"])
-            print(f"  ✓ Batch {batchNum} - {len(items)} tracks (total: {len(trackIds)})")
+            trackIds.extend(item["track"]["id"] for item in items if item.get("track") and item["track"].get("id"))
             offset += len(items)
-            batchNum += 1
         print(f"Completed - {len(trackIds)} liked tracks fetched")
         return trackIds
 
     def getUserTopTracks(self, maxTracks=200, timeRange="medium_term"):
         allIds = []
-        totalBatches = (maxTracks + 49) // 50
         print(f"Fetching top {maxTracks} tracks ({timeRange})...")
         
         for offset in range(0, maxTracks, 50):
-            batchNum = (offset // 50) + 1
             limitPerRequest = min(50, maxTracks - offset)
             
             results = self._withRetry(
@@ -185,8 +290,7 @@ class SpotifyConnection:
             items = results.get("items", [])
             if not items:
                 break
-            allIds.extend([t["id"] for t in items])
-            print(f"  ✓ Batch {batchNum}/{totalBatches} - {len(items)} tracks (total: {len(allIds)})")
+            allIds.extend(t["id"] for t in items if t and t.get("id"))
             if len(items) < limitPerRequest:
                 break
         print(f"Completed - {len(allIds)} top tracks fetched")
@@ -197,72 +301,102 @@ class SpotifyConnection:
         totalTracks = len(trackIds)
         print(f"Fetching track info for {totalTracks} tracks...")
         
-        # Filter out None, empty, or invalid track IDs
-        validTrackIds = [tid for tid in trackIds if tid and isinstance(tid, str) and len(tid) > 0]
+        # Filter out None, empty, or invalid track IDs, and duplicates so each ID takes one batch slot
+        validTrackIds = list(dict.fromkeys(tid for tid in trackIds if isinstance(tid, str) and tid))
         if len(validTrackIds) != totalTracks:
-            print(f"Filtered out {totalTracks - len(validTrackIds)} invalid track IDs")
+            print(f"Filtered out {totalTracks - len(validTrackIds)} invalid or duplicate track IDs")
             totalTracks = len(validTrackIds)
         
         if totalTracks == 0:
             print("No valid track IDs to process")
             return info
         
+        # Only ask Spotify for tracks that aren't in the on-disk cache
+        cached = {} if self.refreshMetadata else self._cacheGet([f"track:{tid}" for tid in validTrackIds], ttl=self.cacheTtl)
+        for tid in validTrackIds:
+            key = f"track:{tid}"
+            if key in cached:
+                info[tid] = cached[key]
+        if info:
+            print(f"Loaded {len(info)} tracks from cache")
+        allTrackIds = validTrackIds
+        validTrackIds = [tid for tid in validTrackIds if tid not in info]
+        totalTracks = len(validTrackIds)
+        
         # Use maximum batch size for efficiency
         batchSize = 50
-        for i in range(0, len(validTrackIds), batchSize):
-            batch = validTrackIds[i:i+batchSize]
-            batchNum = (i // batchSize) + 1
-            totalBatches = (totalTracks + batchSize - 1) // batchSize
-            
+        errorCount = 0
+        
+        def fetchBatch(batchNum, batch):
             try:
                 results = self._withRetry(self.client.tracks, batch)
-                
-                processedCount = 0
-                for t in results["tracks"]:
-                    if t:
-                        name = t["name"]
-                        artists = t.get("artists", [])
-                        if artists:
-                            artistName = artists[0]["name"]
-                            artistId = artists[0]["id"]
-                        else:
-                            artistName = "Unknown"
-                            artistId = None
-                        info[t["id"]] = (name, artistName, artistId)
-                        processedCount += 1
-                print(f"  ✓ Batch {batchNum}/{totalBatches} - {processedCount} tracks")
             except SpotifyException as e:
                 errorMsg = f"Error getting track info for batch {batchNum}: HTTP {e.http_status} - {e.msg}"
                 print(errorMsg, file=sys.stderr)
-                print(f"  ✗ Batch {batchNum}/{totalBatches} - Error: {e.http_status}")
-                # Continue with next batch instead of failing completely
-                continue
+                return None
             except Exception as e:
                 errorMsg = f"Unexpected error getting track info for batch {batchNum}: {str(e)}"
                 print(errorMsg, file=sys.stderr)
-                print(f"  ✗ Batch {batchNum}/{totalBatches} - Error: {str(e)}")
-                # Continue with next batch instead of failing completely
-                continue
-        print(f"Completed - {len(info)} tracks processed")
+                return None
+            batchInfo = {}
+            for t in results["tracks"]:
+                if t:
+                    name = t["name"]
+                    artists = t.get("artists", [])
+                    if artists:
+                        artistName = artists[0]["name"]
+                        artistId = artists[0]["id"]
+                    else:
+                        artistName = "Unknown"
+                        artistId = None
+                    batchInfo[t["id"]] = (name, artistName, artistId)
+            return batchInfo
+        
+        # Batches are independent, so request them concurrently; map keeps results in batch order
+        batches = [validTrackIds[i:i+batchSize] for i in range(0, len(validTrackIds), batchSize)]
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=self.maxWorkers) as executor:
+            for batchInfo in executor.map(fetchBatch, range(1, len(batches) + 1), batches):
+                if batchInfo is None:
+                    # Continue with next batch instead of failing completely
+                    errorCount += 1
+                    continue
+                info.update(batchInfo)
+                fetched.update((f"track:{tid}", value) for tid, value in batchInfo.items())
+        self._cacheSet(fetched)
+        # Return tracks in request order, whatever was cached, so seeded runs stay reproducible
+        info = {tid: info[tid] for tid in allTrackIds if tid in info}
+        print(f"Completed - {len(info)} tracks processed, {errorCount} failed batches")
         return info
 
-    def clearPlaylist(self, playlistId):
-        self._withRetry(self.client.playlist_replace_items, playlist_id=playlistId, items=[])
+    def replacePlaylistTracks(self, playlistId, trackIds):
+        """Replace a playlist's tracks; the first 100 are sent with the clear itself"""
+        result = self._withRetry(self.client.playlist_replace_items, playlist_id=playlistId, items=trackIds[:100])
+        snapshotId = result.get("snapshot_id") if result else None
+        if len(trackIds) > 100:
+            snapshotId = self.addTracksToPlaylist(playlistId, trackIds[100:])
+        # Cache what we just wrote, so the next getPlaylistTracks on it hits the snapshot check
+        if snapshotId:
+            self._cacheSet({f"playlist:{playlistId}": (snapshotId, list(trackIds))})
 
     def addTracksToPlaylist(self, playlistId, trackIds):
+        """Add tracks in batches of 100, one after another so the playlist keeps their order; returns the final snapshot_id"""
         totalTracks = len(trackIds)
         totalBatches = (totalTracks + 99) // 100
         print(f"Adding {totalTracks} tracks to playlist...")
         
+        snapshotId = None
         for i in range(0, len(trackIds), 100):
             batch = trackIds[i:i+100]
             batchNum = (i // 100) + 1
-            self._withRetry(self.client.playlist_add_items, playlist_id=playlistId, items=batch)
+            result = self._withRetry(self.client.playlist_add_items, playlist_id=playlistId, items=batch)
+            snapshotId = result.get("snapshot_id") if result else None
             print(f"  ✓ Batch {batchNum}/{totalBatches} - {len(batch)} tracks added")
         print(f"Completed - {totalTracks} tracks added to playlist")
+        return snapshotId
 
     def getArtistsTopTracks(self, artistIds):
-        """Get top tracks for multiple artists in batches"""
+        """Get top tracks for multiple artists, fetched concurrently"""
         allTopTracks = {}
         totalArtists = len(artistIds)
         print(f"Fetching top tracks for {totalArtists} artists...")
@@ -270,146 +404,179 @@ class SpotifyConnection:
         successCount = 0
         errorCount = 0
         
-        for i in range(0, len(artistIds), 20):  # Process 20 artists at a time
-            batch = artistIds[i:i+20]
-            batchNum = (i // 20) + 1
-            totalBatches = (totalArtists + 19) // 20
-            
-            for j, artistId in enumerate(batch):
-                try:
-                    results = self._withRetry(
-                        self.client.artist_top_tracks,
-                        artistId,
-                        country="US"
-                    )
-                    allTopTracks[artistId] = results["tracks"]
+        # Top tracks change rarely, so reuse cached results and only fetch the rest
+        cached = {} if self.refreshMetadata else self._cacheGet([f"topTracks:{aid}:US" for aid in artistIds], ttl=self.cacheTtl)
+        for artistId in artistIds:
+            key = f"topTracks:{artistId}:US"
+            if key in cached:
+                allTopTracks[artistId] = cached[key]
+                successCount += 1
+        if allTopTracks:
+            print(f"Loaded top tracks for {len(allTopTracks)} artists from cache")
+        missingIds = [aid for aid in artistIds if aid not in allTopTracks]
+        totalBatches = (len(missingIds) + 19) // 20
+        fetched = {}
+        
+        def fetchOne(artistId):
+            try:
+                results = self._withRetry(
+                    self.client.artist_top_tracks,
+                    artistId,
+                    country="US"
+                )
+                return artistId, results["tracks"], None
+            except SpotifyException as e:
+                errorMsg = f"Error getting top tracks for artist {artistId}: HTTP {e.http_status} - {e.msg}"
+                print(errorMsg, file=sys.stderr)
+                return artistId, [], e.http_status
+            except Exception as e:
+                errorMsg = f"Unexpected error getting top tracks for artist {artistId}: {str(e)}"
+                print(errorMsg, file=sys.stderr)
+                return artistId, [], str(e)
+        
+        with ThreadPoolExecutor(max_workers=self.maxWorkers) as executor:
+            for i, (artistId, tracks, error) in enumerate(executor.map(fetchOne, missingIds)):
+                allTopTracks[artistId] = tracks
+                if error is None:
+                    fetched[f"topTracks:{artistId}:US"] = tracks
                     successCount += 1
-                except SpotifyException as e:
-                    errorMsg = f"Error getting top tracks for artist {artistId}: HTTP {e.http_status} - {e.msg}"
-                    print(errorMsg, file=sys.stderr)
-                    allTopTracks[artistId] = []
-                    errorCount += 1
-                except Exception as e:
-                    errorMsg = f"Unexpected error getting top tracks for artist {artistId}: {str(e)}"
-                    print(errorMsg, file=sys.stderr)
-                    allTopTracks[artistId] = []
+                else:
                     errorCount += 1
-            
-            print(f"  ✓ Batch {batchNum}/{totalBatches} completed")
+                if (i + 1) % 20 == 0 or i + 1 == len(missingIds):  # Report every 20 artists
+                    print(f"  ✓ Batch {i // 20 + 1}/{totalBatches} completed")
+        self._cacheSet(fetched)
         
         print(f"Completed - {successCount} artists processed, {errorCount} errors")
         return allTopTracks
 
     def getArtistsAlbums(self, artistIds):
-        """Get albums for multiple artists in batches"""
+        """Get albums for multiple artists, fetched concurrently"""
         allAlbums = {}
-        totalArtists = len(artistIds)
-        print(f"Fetching albums for {totalArtists} artists...")
+        errorCount = 0
+        print(f"Fetching albums for {len(artistIds)} artists...")
         
-        for i in range(0, len(artistIds), 20):  # Process 20 artists at a time
-            batch = artistIds[i:i+20]
-            batchNum = (i // 20) + 1
-            totalBatches = (totalArtists + 19) // 20
-            print(f"  Batch {batchNum}/{totalBatches} ({len(batch)} artists)")
-            
-            for j, artistId in enumerate(batch):
-                try:
-                    results = self._withRetry(
-                        self.client.artist_albums,
-                        artistId,
-                        album_type="album,single",
-                        limit=50
-                    )
-                    allAlbums[artistId] = results["items"]
-                    print(f"    ✓ Artist {j+1}/{len(batch)} - {len(results['items'])} albums")
-                except SpotifyException as e:
-                    errorMsg = f"Error getting albums for artist {artistId}: HTTP {e.http_status} - {e.msg}"
-                    print(errorMsg, file=sys.stderr)
-                    print(f"    ✗ Artist {j+1}/{len(batch)} - Error: {e.http_status}")
-                    allAlbums[artistId] = []
-                except Exception as e:
-                    errorMsg = f"Unexpected error getting albums for artist {artistId}: {str(e)}"
-                    print(errorMsg, file=sys.stderr)
-                    print(f"    ✗ Artist {j+1}/{len(batch)} - Error: {str(e)}")
-                    allAlbums[artistId] = []
-        print(f"Completed fetching albums for {len(allAlbums)} artists")
+        def fetchOne(artistId):
+            try:
+                results = self._withRetry(
+                    self.client.artist_albums,
+                    artistId,
+                    album_type="album,single",
+                    limit=50
+                )
+                return artistId, results["items"], None
+            except SpotifyException as e:
+                errorMsg = f"Error getting albums for artist {artistId}: HTTP {e.http_status} - {e.msg}"
+                print(errorMsg, file=sys.stderr)
+                return artistId, [], e.http_status
+            except Exception as e:
+                errorMsg = f"Unexpected error getting albums for artist {artistId}: {str(e)}"
+                print(errorMsg, file=sys.stderr)
+                return artistId, [], str(e)
+        
+        with ThreadPoolExecutor(max_workers=self.maxWorkers) as executor:
+            for artistId, albums, error in executor.map(fetchOne, artistIds):
+                allAlbums[artistId] = albums
+                if error is not None:
+                    errorCount += 1
+        print(f"Completed fetching albums for {len(allAlbums)} artists, {errorCount} errors")
         return allAlbums
 
     def getAlbumsTracks(self, albumIds):
-        """Get tracks for multiple albums in batches"""
+        """Get tracks for multiple albums, fetched concurrently"""
         allAlbumTracks = {}
-        totalAlbums = len(albumIds)
-        print(f"Fetching tracks for {totalAlbums} albums...")
+        errorCount = 0
+        print(f"Fetching tracks for {len(albumIds)} albums...")
         
-        for i in range(0, len(albumIds), 20):  # Process 20 albums at a time
-            batch = albumIds[i:i+20]
-            batchNum = (i // 20) + 1
-            totalBatches = (totalAlbums + 19) // 20
-            print(f"  Batch {batchNum}/{totalBatches} ({len(batch)} albums)")
-            
-            for j, albumId in enumerate(batch):
-                try:
-                    results = self._withRetry(self.client.album_tracks, albumId)
-                    allAlbumTracks[albumId] = results["items"]
-                    print(f"    ✓ Album {j+1}/{len(batch)} - {len(results['items'])} tracks")
-                except SpotifyException as e:
-                    errorMsg = f"Error getting tracks for album {albumId}: HTTP {e.http_status} - {e.msg}"
-                    print(errorMsg, file=sys.stderr)
-                    print(f"    ✗ Album {j+1}/{len(batch)} - Error: {e.http_status}")
-                    allAlbumTracks[albumId] = []
-                except Exception as e:
-                    errorMsg = f"Unexpected error getting tracks for album {albumId}: {str(e)}"
-                    print(errorMsg, file=sys.stderr)
-                    print(f"    ✗ Album {j+1}/{len(batch)} - Error: {str(e)}")
-                    allAlbumTracks[albumId] = []
-        print(f"Completed fetching tracks for {len(allAlbumTracks)} albums")
+        def fetchOne(albumId):
+            try:
+                results = self._withRetry(self.client.album_tracks, albumId)
+                return albumId, results["items"], None
+            except SpotifyException as e:
+                errorMsg = f"Error getting tracks for album {albumId}: HTTP {e.http_status} - {e.msg}"
+                print(errorMsg, file=sys.stderr)
+                return albumId, [], e.http_status
+            except Exception as e:
+                errorMsg = f"Unexpected error getting tracks for album {albumId}: {str(e)}"
+                print(errorMsg, file=sys.stderr)
+                return albumId, [], str(e)
+        
+        with ThreadPoolExecutor(max_workers=self.maxWorkers) as executor:
+            for albumId, tracks, error in executor.map(fetchOne, albumIds):
+                allAlbumTracks[albumId] = tracks
+                if error is not None:
+                    errorCount += 1
+        print(f"Completed fetching tracks for {len(allAlbumTracks)} albums, {errorCount} errors")
         return allAlbumTracks
 
     def getPlaylistsTracks(self, playlistNames):
-        """Get tracks for multiple playlists in batches"""
+        """Get tracks for multiple playlists, fetched concurrently"""
         allPlaylistTracks = {}
         totalPlaylists = len(playlistNames)
         print(f"Fetching tracks from {totalPlaylists} playlists...")
         
-        for i, name in enumerate(playlistNames):
-            print(f"  Playlist {i+1}/{totalPlaylists}: {name}")
+        def fetchOne(name):
             if name == "Liked Songs":
-                tracks = self.getLikedTracks()
-                allPlaylistTracks[name] = tracks
-                print(f"    ✓ Liked Songs - {len(tracks)} tracks")
-            else:
-                playlistId = self.getPlaylistIdByName(name)
-                if playlistId:
-                    tracks = self.getPlaylistTracks(playlistId)
-                    allPlaylistTracks[name] = tracks
-                    print(f"    ✓ {name} - {len(tracks)} tracks")
-                else:
+                return name, self.getLikedTracks()
+            playlistId = self.getPlaylistIdByName(name)
+            if playlistId:
+                return name, self.getPlaylistTracks(playlistId)
+            return name, None
+        
+        # One request chain per playlist, run side by side
+        with ThreadPoolExecutor(max_workers=self.maxWorkers) as executor:
+            for i, (name, tracks) in enumerate(executor.map(fetchOne, playlistNames)):
+                print(f"  Playlist {i+1}/{totalPlaylists}: {name}")
+                if tracks is None:
                     allPlaylistTracks[name] = []
                     print(f"    ✗ {name} - Not found")
+                else:
+                    allPlaylistTracks[name] = tracks
+                    print(f"    ✓ {name} - {len(tracks)} tracks")
         print(f"Completed fetching tracks from {len(allPlaylistTracks)} playlists")
         return allPlaylistTracks
 
-    def isTitleExcluded(self, title, excludedWords):
-        """Check if a song title contains any excluded words"""
-        if not excludedWords or not title:
-            return False
-        titleLower = title.lower()
-        for word in excludedWords:
-            if word.lower() in titleLower:
-                return True
-        return False
-    
     def getApiCallCount(self):
         """Return the total number of API calls made"""
         return self.apiCallCount
     
     def resetApiCallCount(self):
         """Reset the API call counter"""
-        self.apiCallCount = 0
+        with self._apiCallLock:
+            self.apiCallCount = 0
+
+
+def weightPenalties(weightModifier):
+    """Penalties for baseWeight; they only depend on weightModifier, so work them out once"""
+    return (
+        5 * weightModifier, 7 * weightModifier, 9 * weightModifier,  # In 'Songs I Hear Too Much' 1, 2, 3+ times
+        5 * weightModifier, 4 * weightModifier, 3 * weightModifier,  # Top 50, 100, 200
+    )
+
+
+def baseWeight(tid, tooMuchCounts, topPositions, penalties):
+    """Weight out of 10 before artist penalties, lowered for songs you hear too much (not clamped)"""
+    tooMuchPen1, tooMuchPen2, tooMuchPen3, top50Pen, top100Pen, top200Pen = penalties
+    weight = 10
+    count = tooMuchCounts.get(tid, 0)
+    if count == 1:
+        weight -= tooMuchPen1
+    elif count == 2:
+        weight -= tooMuchPen2
+    elif count >= 3:
+        weight -= tooMuchPen3
+    pos = topPositions.get(tid)
+    if pos is not None:
+        if pos < 50:
+            weight -= top50Pen
+        elif pos < 100:
+            weight -= top100Pen
+        elif pos < 200:
+            weight -= top200Pen
+    return weight
 
 
 class SpotifyRadio:
-    def __init__(self, spotifyConn, config, topTrackIds, topPositions, tooMuchCounts, weightModifier, artistTooMuch, artistBlacklistNames):
+    def __init__(self, spotifyConn, config, topTrackIds, topPositions, tooMuchCounts, weightModifier, artistTooMuch, artistBlacklistIds):
         self.conn = spotifyConn
         self.numArtists = config.get("numberOfRadioArtists", 5)
         self.radioArtistSongs = config.get("radioArtistSongs", 10)
@@ -417,15 +584,28 @@ class SpotifyRadio:
         self.includeInMaster = config.get("includeRadioInMaster", False)
         self.includeDiscover = config.get("includeDiscoverWeeklyInRadio", False)
         self.excludedWords = config.get("excludedWords", [])
+        # One case-insensitive pattern so each title is scanned once instead of once per word
+        self._excludedRe = re.compile("|".join(re.escape(w) for w in self.excludedWords), re.IGNORECASE) if self.excludedWords else None
         self.topTrackIds = topTrackIds
         self.topPositions = topPositions
         self.tooMuchCounts = tooMuchCounts
         self.weightModifier = weightModifier
         self.artistTooMuch = artistTooMuch
-        self.artistBlacklistNames = artistBlacklistNames
+        self.artistBlacklistIds = artistBlacklistIds
+        # Penalties only depend on weightModifier, so work them out once instead of per track
+        self._penalties = weightPenalties(weightModifier)
         print("Spotify connection successful.")
 
-    def generateRadio(self, masterId, config):
+    def isTitleExcluded(self, title):
+        """Check if a song title contains any excluded words"""
+        return bool(self._excludedRe and title and self._excludedRe.search(title))
+
+    def trackWeight(self, tid):
+        """Weight out of 10 for a radio candidate, lowered for songs you hear too much"""
+        weight = baseWeight(tid, self.tooMuchCounts, self.topPositions, self._penalties)
+        return max(0, min(10, weight))
+
+    def generateRadio(self, masterId, config, masterTrackIds=None):
         print("Generating radio...")
         radioTracks = []
         attempted = 0
@@ -437,18 +617,18 @@ class SpotifyRadio:
                 print(f"Including {len(discoverTracks)} tracks from Discover Weekly")
                 radioTracks.extend(discoverTracks)
 
-        masterTrackIds = self.conn.getPlaylistTracks(masterId)
+        if masterTrackIds is None:
+            masterTrackIds = self.conn.getPlaylistTracks(masterId)
         masterInfo = self.conn.getTracksInfo(masterTrackIds)
         # build artistId -> [trackIds] and capture names
-        artistMap = {}
+        artistMap = defaultdict(list)
         artistNames = {}
         for tid, (_, artistName, artistId) in masterInfo.items():
-            if not artistId:
-                continue
-            artistMap.setdefault(artistId, []).append(tid)
-            artistNames[artistId] = artistName
+            if artistId:
+                artistMap[artistId].append(tid)
+                artistNames[artistId] = artistName
 
-        chosen = random.sample(list(artistMap.keys()), min(self.numArtists, len(artistMap)))
+        chosen = random.sample(list(artistMap), min(self.numArtists, len(artistMap)))
         print(f"Chosen artists for radio: {[artistNames[a] for a in chosen]}")
 
         # Only get top tracks - one API call per artist
@@ -459,15 +639,8 @@ class SpotifyRadio:
             artistName = artistNames[artistId]
             print(f"Processing artist {i+1}/{len(chosen)}: {artistName}")
             
-            # Skip blacklisted artists (using string matching)
-            isBlacklisted = False
-            if config.get("artistBlacklist", False):
-                for blacklistedName in self.artistBlacklistNames:
-                    if blacklistedName.lower() in artistName.lower():
-                        isBlacklisted = True
-                        break
-            
-            if isBlacklisted:
+            # Skip blacklisted artists, by ID like the Master loop does
+            if config.get("artistBlacklist", False) and artistId in self.artistBlacklistIds:
                 print(f"  Skipping blacklisted artist: {artistName}")
                 continue
                 
@@ -482,28 +655,12 @@ class SpotifyRadio:
                 title = t["name"]
                 
                 # Skip songs with excluded words in title
-                if self.conn.isTitleExcluded(title, self.excludedWords):
+                if self.isTitleExcluded(title):
                     print(f"    Skipping '{title}' - contains excluded word")
                     continue
                 
                 if self.removeByWeight:
-                    weight = 10
-                    tmCount = self.tooMuchCounts.get(tid, 0)
-                    if tmCount == 1:
-                        weight -= 5 * self.weightModifier
-                    elif tmCount == 2:
-                        weight -= 7 * self.weightModifier
-                    elif tmCount >= 3:
-                        weight -= 9 * self.weightModifier
-                    if tid in self.topPositions:
-                        pos = self.topPositions[tid]
-                        if pos < 50:
-                            weight -= 5 * self.weightModifier
-                        elif pos < 100:
-                            weight -= 4 * self.weightModifier
-                        elif pos < 200:
-                            weight -= 3 * self.weightModifier
-                    weight = max(0, min(10, weight))
+                    weight = self.trackWeight(tid)
                     if random.random() >= (weight / 10):
                         continue
                 
@@ -530,11 +687,12 @@ class SpotifyRadio:
 
         currentDate = datetime.now().strftime("%Y-%m-%d")
         radioId = self.conn.getOrCreatePlaylist("[RX] Radio", description=f"[RX] Radio generated by script - {currentDate}")
-        self.conn.clearPlaylist(radioId)
-        if radioTracks:
-            random.shuffle(radioTracks)
-            self.conn.addTracksToPlaylist(radioId, radioTracks)
+        # Drop tracks that showed up more than once (e.g. in Discover Weekly and an artist's top tracks)
+        radioTracks = list(dict.fromkeys(radioTracks))
+        random.shuffle(radioTracks)
+        self.conn.replacePlaylistTracks(radioId, radioTracks)
         print(f"Updated '[RX] Radio' with {len(radioTracks)} tracks")
+        return radioId, radioTracks
 
 
 def loadConfig(configPath="config.json"):
@@ -562,6 +720,10 @@ def parseArgs():
     parser.add_argument("--artistBlacklist", action="store_true", help="Enable artist blacklist feature")
     parser.add_argument("--masterSongs", type=int, help="Maximum number of songs in master playlist before adding radio")
     parser.add_argument("--excludedWords", nargs="+", help="Words to exclude from song titles")
+    parser.add_argument("--apiWorkers", type=int, help="Number of concurrent Spotify API requests")
+    parser.add_argument("--seed", type=int, help="Random seed, to reproduce the same selection and shuffle")
+    parser.add_argument("--verbose", action="store_true", help="Print every master weight decision")
+    parser.add_argument("--refreshMetadata", action="store_true", help="Re-fetch track info and artist top tracks instead of using the cache")
     return parser.parse_args()
 
 def main():
@@ -593,6 +755,21 @@ def main():
         config["masterSongs"] = args.masterSongs
     if args.excludedWords:
         config["excludedWords"] = args.excludedWords
+    if args.apiWorkers is not None:
+        config["apiWorkers"] = args.apiWorkers
+    if args.verbose:
+        config["verbose"] = True
+    if args.refreshMetadata:
+        config["refreshMetadata"] = True
+    if args.seed is not None:
+        config["seed"] = args.seed
+    
+    if config.get("apiWorkers", 8) < 1:
+        print(f"apiWorkers must be at least 1, got {config['apiWorkers']}", file=sys.stderr)
+        sys.exit(1)
+    
+    if config.get("seed") is not None:
+        random.seed(config["seed"])
     
     weightModifier = config.get("weightModifier", 1)
     
@@ -613,173 +790,189 @@ def main():
             "user-top-read "
             "user-library-read"
         ),
-        cachePath=".cache"
+        cachePath=".cache",
+        # Next to the script, so runs started from another directory share the same cache
+        metadataCachePath=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".rxcache"),
+        maxWorkers=config.get("apiWorkers", 8),
+        refreshMetadata=config.get("refreshMetadata", False)
     )
 
     currentDate = datetime.now().strftime("%Y-%m-%d")
     masterId = spotifyConn.getOrCreatePlaylist("[RX] Master", description=f"Generated by script - {currentDate}")
     tooMuchId = spotifyConn.getOrCreatePlaylist("[RX] Songs I Hear Too Much", description="Generated by script")
 
-    topTrackIds = spotifyConn.getUserTopTracks(maxTracks=200)
+    # These reads don't depend on each other, so fetch them side by side
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        topFuture = executor.submit(spotifyConn.getUserTopTracks, maxTracks=200)
+        tooMuchFuture = executor.submit(spotifyConn.getPlaylistTracks, tooMuchId) if tooMuchId else None
+        masterFuture = executor.submit(spotifyConn.getPlaylistTracks, masterId)
+        topTrackIds = topFuture.result()
+        tooMuchTracks = tooMuchFuture.result() if tooMuchFuture else []
+        masterTrackIds = masterFuture.result()
     topPositions = {tid: idx for idx, tid in enumerate(topTrackIds)}
 
-    tooMuchCounts = {}
-    if tooMuchId:
-        for tid in spotifyConn.getPlaylistTracks(tooMuchId):
-            tooMuchCounts[tid] = tooMuchCounts.get(tid, 0) + 1
+    tooMuchCounts = Counter(tooMuchTracks)
 
     # Build artist-too-much mapping if enabled
     artistTooMuch = set()
-    artistBlacklistNames = set()  # Store artist names for string matching
+    artistBlacklistNames = set()  # Artist names, for the summary printed below
+    artistBlacklistIds = set()  # Same artists by ID, which is what Radio and Master check against
     if config.get("artistIHearTooMuch", False) or config.get("artistBlacklist", False):
         # Use the tracks we already fetched for tooMuchCounts
-        if tooMuchId:
-            tooMuchTracks = spotifyConn.getPlaylistTracks(tooMuchId)
-            if tooMuchTracks:
-                # Count actual track occurrences (including duplicates)
-                trackOccurrences = {}
-                for tid in tooMuchTracks:
-                    trackOccurrences[tid] = trackOccurrences.get(tid, 0) + 1
-                print("Getting track info for 'Songs I Hear Too Much'")
-                trackIds = list(trackOccurrences.keys())
-                print(f"Track IDs to process: {len(trackIds)}")
-                if trackIds:
-                    print(f"First few track IDs: {trackIds[:5]}")
-                tooMuchInfo = spotifyConn.getTracksInfo(trackIds)
-                
-                artistNameCounts = {}  # Count by artist name
-                
-                for tid, (trackName, artistName, artistId) in tooMuchInfo.items():
-                    if artistName:
-                        # Count each track the number of times it appears
-                        count = trackOccurrences.get(tid, 1)
-                        artistNameCounts[artistName] = artistNameCounts.get(artistName, 0) + count
-                
-                # Tiered system: 3+ for weight reduction, 10+ for blacklist
-                if config.get("artistIHearTooMuch", False):
-                    # For weight reduction, we still need artist IDs for the existing logic
-                    artistTooMuch = set()
-                    for tid, (_, artistName, artistId) in tooMuchInfo.items():
-                        if artistId and artistNameCounts.get(artistName, 0) >= 3:
-                            artistTooMuch.add(artistId)
-                            
-                if config.get("artistBlacklist", False):
-                    # For blacklisting, use artist names
-                    artistBlacklistNames = {name for name, count in artistNameCounts.items() if count >= 10}
-                
-                if artistTooMuch:
-                    print(f"Found {len(artistTooMuch)} artists with 3+ songs in 'Songs I Hear Too Much':")
-                    # Get artist names and counts
-                    for artistName, count in artistNameCounts.items():
-                        if count >= 3:
-                            status = " (BLACKLISTED)" if count >= 10 else ""
-                            print(f"  {artistName}: {count} songs{status}")
-                if artistBlacklistNames:
-                    print(f"Found {len(artistBlacklistNames)} artists with 10+ songs - BLACKLISTED")
-                    print(f"Blacklisted artists: {', '.join(artistBlacklistNames)}")
+        if tooMuchTracks:
+            print("Getting track info for 'Songs I Hear Too Much'")
+            trackIds = list(tooMuchCounts.keys())
+            print(f"Track IDs to process: {len(trackIds)}")
+            if trackIds:
+                print(f"First few track IDs: {trackIds[:5]}")
+            tooMuchInfo = spotifyConn.getTracksInfo(trackIds)
+            
+            artistNameCounts = Counter()  # Count by artist name, including duplicate tracks
+            
+            for tid, (trackName, artistName, artistId) in tooMuchInfo.items():
+                if artistName:
+                    # Count each track the number of times it appears
+                    artistNameCounts[artistName] += tooMuchCounts.get(tid, 1)
+            
+            # Tiered system: 3+ for weight reduction, 10+ for blacklist
+            if config.get("artistIHearTooMuch", False):
+                # For weight reduction, we still need artist IDs for the existing logic
+                artistTooMuch = set()
+                for tid, (_, artistName, artistId) in tooMuchInfo.items():
+                    if artistId and artistNameCounts.get(artistName, 0) >= 3:
+                        artistTooMuch.add(artistId)
+                        
+            if config.get("artistBlacklist", False):
+                # For blacklisting, use artist names
+                artistBlacklistNames = {name for name, count in artistNameCounts.items() if count >= 10}
+                artistBlacklistIds = {artistId for _, artistName, artistId in tooMuchInfo.values() if artistId and artistName in artistBlacklistNames}
+            
+            if artistTooMuch:
+                print(f"Found {len(artistTooMuch)} artists with 3+ songs in 'Songs I Hear Too Much':")
+                # Get artist names and counts
+                for artistName, count in artistNameCounts.items():
+                    if count >= 3:
+                        status = " (BLACKLISTED)" if count >= 10 else ""
+                        print(f"  {artistName}: {count} songs{status}")
+            if artistBlacklistNames:
+                print(f"Found {len(artistBlacklistNames)} artists with 10+ songs - BLACKLISTED")
+                print(f"Blacklisted artists: {', '.join(artistBlacklistNames)}")
 
     # first: radio
-    radio = SpotifyRadio(spotifyConn, config, topTrackIds, topPositions, tooMuchCounts, weightModifier, artistTooMuch, artistBlacklistNames)
-    radio.generateRadio(masterId, config)
+    radio = SpotifyRadio(spotifyConn, config, topTrackIds, topPositions, tooMuchCounts, weightModifier, artistTooMuch, artistBlacklistIds)
+    _, radioTrackIds = radio.generateRadio(masterId, config, masterTrackIds=masterTrackIds)
 
     # then: master (verbose)
     print("Fetching playlist tracks in batches...")
     allPlaylistTracks = spotifyConn.getPlaylistsTracks(config["playlistsToInclude"])
     
-    rawIds = []
-    for name, trackIds in allPlaylistTracks.items():
-        rawIds.extend(trackIds)
+    rawIds = list(chain.from_iterable(allPlaylistTracks.values()))
+
+    # getTracksInfo drops duplicates and returns tracks in playlist order, cached or not, so a seeded run always sees the same order
+    allInfo = spotifyConn.getTracksInfo(rawIds)
+
+    # Skip blacklisted artists entirely, before any weighting
+    if config.get("artistBlacklist", False) and artistBlacklistIds:
+        totalTracks = len(allInfo)
+        allInfo = {tid: info for tid, info in allInfo.items() if info[2] not in artistBlacklistIds}
+        print(f"Removed {totalTracks - len(allInfo)} tracks by blacklisted artists (10+ songs in 'Songs I Hear Too Much')")
+
+    # Songs each artist has in 'Songs I Hear Too Much', summed once up front instead of per track
+    artistToTooMuchSum = Counter()
+    for tid, (_, _, artistId) in allInfo.items():
+        count = tooMuchCounts.get(tid, 0)
+        if count:
+            artistToTooMuchSum[artistId] += count
 
-    allInfo = spotifyConn.getTracksInfo(list(set(rawIds)))
-    trackMap = {f"{n} - {a}": (tid, n, a) for tid, (n, a, _) in allInfo.items()}
+    # Loop-invariant settings and penalties, looked up and multiplied once
+    artistTooMuchOn = config.get("artistIHearTooMuch", False)
+    tooMuchPen1, tooMuchPen2, tooMuchPen3, top50Pen, top100Pen, top200Pen = weightPenalties(weightModifier)
+    artist6Pen, artist3Pen = 3 * weightModifier, 2 * weightModifier
+    tooMuchGet = tooMuchCounts.get
+    topPositionGet = topPositions.get
+
+    # Per-track decisions are only formatted when verbose, and written in one go after the loop
+    verbose = config.get("verbose", False)
+    decisionLines = []
 
     selected = []
-    print("⎯⎯ Master Weight Decisions ⎯⎯")
-    for key, (tid, name, artist) in trackMap.items():
-        # Skip blacklisted artists entirely (using string matching)
-        isBlacklisted = False
-        if config.get("artistBlacklist", False):
-            for blacklistedName in artistBlacklistNames:
-                if blacklistedName.lower() in artist.lower():
-                    isBlacklisted = True
-                    break
-        
-        if isBlacklisted:
-            print(f"{name} by {artist}: BLACKLISTED (10+ songs in 'Songs I Hear Too Much')")
+    seenSongs = set()  # (name, artist) pairs, so the same song under several IDs is only considered once
+    for tid, (name, artist, artistId) in allInfo.items():
+        if (name, artist) in seenSongs:
             continue
-            
+        seenSongs.add((name, artist))
+        
+        # baseWeight inlined, this loop runs once per track in every included playlist
         weight = 10
-        count = tooMuchCounts.get(tid, 0)
+        count = tooMuchGet(tid, 0)
         if count == 1:
-            weight -= 5 * weightModifier
+            weight -= tooMuchPen1
         elif count == 2:
-            weight -= 7 * weightModifier
+            weight -= tooMuchPen2
         elif count >= 3:
-            weight -= 9 * weightModifier
-        if tid in topPositions:
-            pos = topPositions[tid]
+            weight -= tooMuchPen3
+        pos = topPositionGet(tid)
+        if pos is not None:
             if pos < 50:
-                weight -= 5 * weightModifier
+                weight -= top50Pen
             elif pos < 100:
-                weight -= 4 * weightModifier
+                weight -= top100Pen
             elif pos < 200:
-                weight -= 3 * weightModifier
+                weight -= top200Pen
                 
         # Enhanced artist weight reduction for 6+ songs
-        if tid in allInfo and config.get("artistIHearTooMuch", False):
-            artistId = allInfo[tid][2]
-            if artistId in artistTooMuch:
-                # Count how many songs by this artist are in 'Songs I Hear Too Much'
-                artistCount = 0
-                for trackId, (_, _, trackArtistId) in allInfo.items():
-                    if trackArtistId == artistId and trackId in tooMuchCounts:
-                        artistCount += tooMuchCounts[trackId]
+        if artistTooMuchOn and artistId in artistTooMuch:
+            # Count how many songs by this artist are in 'Songs I Hear Too Much'
+            artistCount = artistToTooMuchSum.get(artistId, 0)
+            
+            if artistCount >= 6:
+                weight -= artist6Pen
+                if verbose:
+                    decisionLines.append(f"{name} by {artist}: artist has {artistCount} songs in 'Songs I Hear Too Much', weight reduced by 3")
+            elif artistCount >= 3:
+                weight -= artist3Pen
+                if verbose:
+                    decisionLines.append(f"{name} by {artist}: artist has {artistCount} songs in 'Songs I Hear Too Much', weight reduced by 2")
                 
-                if artistCount >= 6:
-                    weight -= 3 * weightModifier
-                    print(f"{name} by {artist}: artist has {artistCount} songs in 'Songs I Hear Too Much', weight reduced by 3")
-                elif artistCount >= 3:
-                    weight -= 2 * weightModifier
-                    print(f"{name} by {artist}: artist has {artistCount} songs in 'Songs I Hear Too Much', weight reduced by 2")
-                    
         included = random.random() < (weight / 10)
-        if weight != 10 or not included:
+        if verbose and (weight != 10 or not included):
             status = "included" if included else "excluded"
-            print(f"{name} by {artist}: weight={weight}, {status}")
+            decisionLines.append(f"{name} by {artist}: weight={weight}, {status}")
         if included:
             selected.append(tid)
-    print("⎯⎯ End Master Decisions ⎯⎯\n")
+    if verbose:
+        sys.stdout.write("⎯⎯ Master Weight Decisions ⎯⎯\n")
+        sys.stdout.write("\n".join(decisionLines))
+        sys.stdout.write("\n⎯⎯ End Master Decisions ⎯⎯\n\n")
+    print(f"Master weighting selected {len(selected)} of {len(allInfo)} tracks")
 
     if selected:
-        # Shuffle the selected tracks first
-        random.shuffle(selected)
-        
         # Apply masterSongs limit BEFORE adding radio
         masterSongs = config.get("masterSongs", 1000) # Default to 1000 if not specified
         if len(selected) > masterSongs:
             print(f"Selected tracks exceed masterSongs ({masterSongs}). Truncating to {masterSongs} tracks.")
-            selected = selected[:masterSongs]
+            selected = random.sample(selected, masterSongs)
         
         # Get radio tracks if enabled and shuffle them INTO master
-        finalTracks = selected.copy()
+        # generateRadio already told us what it wrote, so no need to read the playlist back
+        radioTracks = []
         if config.get("includeRadioInMaster", False):
-            radioId = spotifyConn.getPlaylistIdByName("[RX] Radio")
-            if radioId:
-                radioTracks = spotifyConn.getPlaylistTracks(radioId)
-                if radioTracks:
-                    print(f"Integrating {len(radioTracks)} radio tracks into master playlist")
-                    finalTracks.extend(radioTracks)
-                    # Final shuffle to integrate radio tracks throughout the playlist
-                    random.shuffle(finalTracks)
-                    print(f"Final '[RX] Master' contains {len(selected)} master + {len(radioTracks)} radio = {len(finalTracks)} tracks total")
-                else:
-                    print("No radio tracks found to add to master")
-            else:
-                print("Radio playlist not found")
+            radioTracks = radioTrackIds
+            if not radioTracks:
+                print("No radio tracks found to add to master")
+        
+        # selected isn't needed after this, so extend it in place and shuffle master + radio once
+        masterCount = len(selected)
+        finalTracks = selected
+        if radioTracks:
+            print(f"Integrating {len(radioTracks)} radio tracks into master playlist")
+            finalTracks.extend(radioTracks)
+        random.shuffle(finalTracks)
+        if radioTracks:
+            print(f"Final '[RX] Master' contains {masterCount} master + {len(radioTracks)} radio = {len(finalTracks)} tracks total")
         
-        # Clear playlist and add all tracks (master + radio, shuffled together)
-        spotifyConn.clearPlaylist(masterId)
-        spotifyConn.addTracksToPlaylist(masterId, finalTracks)
+        # Replace playlist with all tracks (master + radio, shuffled together)
+        spotifyConn.replacePlaylistTracks(masterId, finalTracks)
         print(f"Updated '[RX] Master' with {len(finalTracks)} tracks")
     else:
         print("No tracks selected for master playlist")